@@ -5,7 +5,7 @@ import os
 from dotenv import load_dotenv
 from notion import get_transactions_from_notion
 from drive import display_drive_message
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
 # Configuration des constantes
 load_dotenv(override=True)
@@ -84,17 +84,228 @@ def check_password() -> bool:
     else:
         return True
 
-@st.cache_data(ttl=3600, show_spinner="Chargement des transactions depuis Notion...")
+@st.cache_resource(ttl=3600, show_spinner="Chargement des transactions depuis Notion...")
 def get_transactions(force_reload: bool = False) -> Optional[pl.DataFrame]:
+    # Le DataFrame Polars est immuable : il est partagé entre les sessions
+    # plutôt que sérialisé puis copié à chaque appel comme avec st.cache_data
     return get_transactions_from_notion(force_reload=force_reload)
 
-def create_pie_chart(df_categories: pl.DataFrame, labels: List[str], map_categories: pl.DataFrame, groupe: str, periode_specifique: str, lissage: bool) -> go.Figure:
+def hash_dataframe(df: pl.DataFrame) -> int:
+    """Calcule une empreinte du contenu d'un DataFrame pour les caches Streamlit.
+    
+    Args:
+        df (pl.DataFrame): DataFrame à hacher
+        
+    Returns:
+        int: Empreinte du DataFrame
+    """
+    return df.hash_rows().sum()
+
+POLARS_HASH_FUNCS = {pl.DataFrame: hash_dataframe}
+
+def hash_transactions(df: pl.DataFrame) -> Tuple[int, Optional[str]]:
+    """Calcule une empreinte peu coûteuse du DataFrame complet des transactions.
+    
+    Toute synchronisation avec Notion ajoute des lignes ou fait avancer la date
+    de dernière modification : inutile de hacher toutes les lignes.
+    
+    Args:
+        df (pl.DataFrame): DataFrame des transactions
+        
+    Returns:
+        Tuple[int, Optional[str]]: Empreinte du DataFrame
+    """
+    return df.height, df["last_edited_time"].max()
+
+@st.cache_data(ttl=3600, show_spinner=False, hash_funcs={pl.DataFrame: hash_transactions})
+def get_periode_options(df: pl.DataFrame) -> Dict[str, List[int]]:
+    """Liste les valeurs de chaque type de période, de la plus récente à la plus ancienne.
+    
+    Args:
+        df (pl.DataFrame): DataFrame des transactions
+        
+    Returns:
+        Dict[str, List[int]]: Valeurs distinctes par type de période
+    """
+    return {periode: df[periode].unique().sort(descending=True).to_list() for periode in MAP_PERIODE_NAMES}
+
+def get_categorie_codes(categories: List[str]) -> pl.Series:
+    """Convertit des noms de catégories en codes physiques du cache global de chaînes.
+    
+    Le cache de chaînes étant global, ces codes sont ceux des colonnes
+    catégorielles du DataFrame : le filtrage compare des entiers plutôt que
+    des chaînes.
+    
+    Args:
+        categories (List[str]): Noms des catégories
+        
+    Returns:
+        pl.Series: Codes physiques des catégories
+    """
+    return pl.Series(categories, dtype=pl.Categorical).to_physical()
+
+def format_periode(periode: str, valeur: int) -> str:
+    """Formate une clé de période entière pour l'affichage (2024-03, 2024-T1, 2024).
+    
+    Args:
+        periode (str): Type de période
+        valeur (int): Clé entière de la période
+        
+    Returns:
+        str: Libellé de la période
+    """
+    if periode == "mois":
+        return f"{valeur // 100}-{valeur % 100:02d}"
+    if periode == "trimestre":
+        return f"{valeur // 10}-T{valeur % 10}"
+    return str(valeur)
+
+def format_periodes(periode: str) -> pl.Expr:
+    """Équivalent vectorisé de format_periode sur la colonne de la période.
+    
+    Args:
+        periode (str): Type de période
+        
+    Returns:
+        pl.Expr: Expression des libellés de période
+    """
+    cle = pl.col(periode)
+    if periode == "mois":
+        libelle = pl.concat_str([(cle // 100).cast(pl.Utf8), pl.lit("-"), (cle % 100).cast(pl.Utf8).str.zfill(2)])
+    elif periode == "trimestre":
+        libelle = pl.concat_str([(cle // 10).cast(pl.Utf8), pl.lit("-T"), (cle % 10).cast(pl.Utf8)])
+    else:
+        libelle = cle.cast(pl.Utf8)
+    return libelle.alias(periode)
+
+def format_milliers(montant: pl.Expr) -> pl.Expr:
+    """Formate un montant arrondi à l'euro avec un séparateur de milliers.
+    
+    Équivalent vectorisé de f"{x:,.0f}" : le moteur regex de Polars ne gère
+    pas les lookahead, les groupes de trois chiffres sont donc insérés sur la
+    chaîne inversée.
+    
+    Args:
+        montant (pl.Expr): Expression du montant
+        
+    Returns:
+        pl.Expr: Expression du montant formaté
+    """
+    arrondi = montant.round(0).cast(pl.Int64)
+    chiffres = (
+        arrondi.abs().cast(pl.Utf8)
+        .str.reverse()
+        .str.replace_all(r"(\d{3})", "${1},")
+        .str.strip_chars_end(",")
+        .str.reverse()
+    )
+    return pl.when(arrondi < 0).then(pl.lit("-")).otherwise(pl.lit("")) + chiffres
+
+def filter_transactions(df: pl.DataFrame, compte: str, selected_categories: Tuple[str, ...], groupe: str) -> pl.LazyFrame:
+    """Filtre les transactions par compte et selon les catégories sélectionnées.
+    
+    Args:
+        df (pl.DataFrame): DataFrame des transactions
+        compte (str): Compte sélectionné
+        selected_categories (Tuple[str, ...]): Catégories sélectionnées
+        groupe (str): Groupe de catégories
+        
+    Returns:
+        pl.LazyFrame: Requête des transactions filtrées
+    """
+    selected_codes = get_categorie_codes(list(selected_categories))
+    return df.lazy().filter(pl.col("compte") == compte).filter(
+        pl.col("categorie-parent").to_physical().is_in(selected_codes) & 
+        pl.col("categorie-enfant").to_physical().is_in(selected_codes) | 
+        pl.col(f"categorie-{groupe}").is_null()
+    )
+
+# Les agrégations sont mises en cache sur l'empreinte du DataFrame complet et
+# sur les filtres : le DataFrame filtré n'est jamais haché
+@st.cache_data(ttl=3600, show_spinner=False, hash_funcs={pl.DataFrame: hash_transactions})
+def compute_categories(df: pl.DataFrame, compte: str, selected_categories: Tuple[str, ...], groupe: str, periode: str, periode_specifique: int, facteur_lissage: int) -> pl.DataFrame:
+    """Calcule les dépenses par catégorie sur la période sélectionnée.
+    
+    Args:
+        df (pl.DataFrame): DataFrame des transactions
+        compte (str): Compte sélectionné
+        selected_categories (Tuple[str, ...]): Catégories sélectionnées
+        groupe (str): Groupe de catégories
+        periode (str): Période
+        periode_specifique (int): Période spécifique
+        facteur_lissage (int): Nombre de mois de la période
+        
+    Returns:
+        pl.DataFrame: DataFrame des dépenses par catégorie
+    """
+    lf_camembert = filter_transactions(df, compte, selected_categories, groupe).filter(
+        (pl.col(f"categorie-{groupe}") != "Revenus") & (pl.col(periode) == periode_specifique)
+    )
+
+    if groupe == "enfant":
+        return lf_camembert.group_by("categorie-enfant").agg([
+            pl.when(pl.col("montant").sum() < 0).then(pl.col("montant").sum().abs() / facteur_lissage).alias("montant")
+        ]).collect()
+
+    # Une seule agrégation par sous-catégorie : les totaux par catégorie et le
+    # détail du survol sont ensuite calculés sur ce résultat réduit
+    lf_enfants = (
+        lf_camembert
+        .group_by(["categorie-parent", "categorie-enfant"])
+        .agg((pl.col("montant").sum() / facteur_lissage).alias("montant"))
+        .sort("montant")
+        .with_columns([format_milliers(pl.col("montant")).alias("montant_format")])
+    )
+
+    return lf_enfants.group_by("categorie-parent").agg([
+        pl.when(pl.col("montant").sum() < 0).then(pl.col("montant").sum().abs()).alias("montant"),
+        pl.format("{}: {}€", "categorie-enfant", "montant_format").alias("details")
+    ]).with_columns([
+        pl.col("details").list.join("<br>").alias("hover_detail")
+    ]).select(["categorie-parent", "montant", "hover_detail"]).collect()
+
+@st.cache_data(ttl=3600, show_spinner=False, hash_funcs={pl.DataFrame: hash_transactions})
+def compute_totaux(df: pl.DataFrame, compte: str, selected_categories: Tuple[str, ...], groupe: str, periode: str, facteur_lissage: int) -> pl.DataFrame:
+    """Calcule les dépenses, revenus et épargne par période.
+    
+    Args:
+        df (pl.DataFrame): DataFrame des transactions
+        compte (str): Compte sélectionné
+        selected_categories (Tuple[str, ...]): Catégories sélectionnées
+        groupe (str): Groupe de catégories
+        periode (str): Période
+        facteur_lissage (int): Nombre de mois de la période
+        
+    Returns:
+        pl.DataFrame: DataFrame des totaux par période
+    """
+    return filter_transactions(df, compte, selected_categories, groupe).group_by(periode).agg([
+        (pl.col("montant").filter(pl.col("categorie-parent") != "Revenus").sum() / facteur_lissage).alias("depenses"),
+        (pl.col("montant").filter(pl.col("categorie-parent") == "Revenus").sum() / facteur_lissage).alias("revenus"),
+        (pl.col("montant").sum() / facteur_lissage).alias("epargne")
+    ]).sort(periode).collect()
+
+@st.cache_data(ttl=3600, show_spinner=False, hash_funcs={pl.DataFrame: hash_transactions})
+def get_enfant_to_parent(df: pl.DataFrame) -> Dict[str, str]:
+    """Associe chaque catégorie enfant à sa catégorie parente.
+    
+    Args:
+        df (pl.DataFrame): DataFrame des transactions
+        
+    Returns:
+        Dict[str, str]: Catégorie parente de chaque catégorie enfant
+    """
+    map_categories = df.select(["categorie-enfant", "categorie-parent"]).unique()
+    return dict(zip(map_categories["categorie-enfant"].to_list(), map_categories["categorie-parent"].to_list()))
+
+@st.cache_data(ttl=3600, show_spinner=False, hash_funcs=POLARS_HASH_FUNCS)
+def create_pie_chart(df_categories: pl.DataFrame, labels: List[str], enfant_to_parent: Dict[str, str], groupe: str, periode_specifique: str, lissage: bool) -> go.Figure:
     """Crée le graphique en camembert.
     
     Args:
         df_categories (pl.DataFrame): DataFrame des catégories
         labels (List[str]): Liste des labels
-        map_categories (pl.DataFrame): Mapping des catégories
+        enfant_to_parent (Dict[str, str]): Catégorie parente de chaque catégorie enfant
         groupe (str): Groupe de catégories
         periode_specifique (str): Période spécifique
         lissage (bool): Indique si le lissage est activé
@@ -109,18 +320,18 @@ def create_pie_chart(df_categories: pl.DataFrame, labels: List[str], map_categor
 
     total = df_categories["montant"].sum()
 
-    if "hover_detail" in df_categories.columns:
+    if "hover_detail" in df_categories.columns and not df_categories.is_empty():
         hover_template = "<b>%{label}</b> (%{percent:.1%})<br>Total: -%{value:,.0f}€<br><br>%{customdata}<extra></extra>"
-        customdata = df_categories["hover_detail"].to_list()
+        customdata = df_categories["hover_detail"].to_numpy()
     else:
         hover_template = "<b>%{label}</b> (%{percent:.1%})<br>Total: -%{value:,.0f}€<extra></extra>"
         customdata = None
 
     fig.add_trace(go.Pie(
         labels=labels,
-        values=df_categories['montant'].to_list(),
+        values=df_categories['montant'].to_numpy(),
         marker=dict(
-            colors=[CATEGORY_COLORS[map_categories.filter(pl.col(f"categorie-{groupe}") == cat).to_series().to_list()[0]] for cat in labels],
+            colors=[CATEGORY_COLORS[enfant_to_parent[cat] if groupe == "enfant" else cat] for cat in labels],
             line=dict(color='#B0B0B0', width=1)
         ),
         hovertemplate=hover_template,
@@ -149,11 +360,14 @@ def create_pie_chart(df_categories: pl.DataFrame, labels: List[str], map_categor
             x=0.5,
             y=0.5,
             showarrow=False
-        )]
+        )],
+        # Conserve l'état de l'interface (légende masquée, survol) entre les reruns
+        uirevision="constant"
     )
 
     return fig
 
+@st.cache_data(ttl=3600, show_spinner=False, hash_funcs=POLARS_HASH_FUNCS)
 def create_bar_chart(df_totaux: pl.DataFrame, periode: str, lissage: bool) -> go.Figure:
     """Crée le graphique en barres.
     
@@ -170,17 +384,20 @@ def create_bar_chart(df_totaux: pl.DataFrame, periode: str, lissage: bool) -> go
     if lissage:
         title += ' (/mois)'
 
+    # Conversion unique de l'axe des périodes, partagé par les trois traces
+    periodes = df_totaux.select(format_periodes(periode))[periode].to_numpy()
+
     # Ajout des barres de dépenses et revenus
     fig.add_trace(go.Bar(
-        x=df_totaux[periode].to_list(),
-        y=df_totaux["depenses"].to_list(),
+        x=periodes,
+        y=df_totaux["depenses"].to_numpy(),
         name='Dépenses',
         marker_color=CATEGORY_COLORS['Quotidien'],
         hovertemplate="%{x}<br>Dépenses: %{y:,.0f}€<extra></extra>"
     ))
     fig.add_trace(go.Bar(
-        x=df_totaux[periode].to_list(),
-        y=df_totaux["revenus"].to_list(),
+        x=periodes,
+        y=df_totaux["revenus"].to_numpy(),
         name='Revenus',
         marker_color=CATEGORY_COLORS['Revenus'],
         hovertemplate="%{x}<br>Revenus: %{y:,.0f}€<extra></extra>"
@@ -188,8 +405,8 @@ def create_bar_chart(df_totaux: pl.DataFrame, periode: str, lissage: bool) -> go
     
     # Ajout de la courbe d'épargne
     fig.add_trace(go.Scatter(
-        x=df_totaux[periode].to_list(),
-        y=df_totaux["epargne"].to_list(),
+        x=periodes,
+        y=df_totaux["epargne"].to_numpy(),
         name='Épargne',
         mode='lines+markers',
         line=dict(color=CATEGORY_COLORS['Transports'], width=2),
@@ -212,22 +429,23 @@ def create_bar_chart(df_totaux: pl.DataFrame, periode: str, lissage: bool) -> go
             xanchor="center",
             x=0.5
         ),
-        dragmode=False
+        dragmode=False,
+        uirevision="constant"
     )
     return fig
 
-def create_sidebar_filters(df: pl.DataFrame) -> Tuple[str, str, str, List[str], bool, str]:
+def create_sidebar_filters(df: pl.DataFrame) -> Tuple[str, int, str, List[str], bool, str]:
     """Crée les filtres dans la sidebar.
     
     Args:
         df (pl.DataFrame): DataFrame des transactions
         
     Returns:
-        Tuple[str, str, str, List[str], bool, str]: Période, période spécifique, groupe, catégories sélectionnées, lissage, compte
+        Tuple[str, int, str, List[str], bool, str]: Période, période spécifique, groupe, catégories sélectionnées, lissage, compte
     """
     # Bouton de rechargement
     if st.sidebar.button("🔄 Recharger depuis Notion"):
-        st.cache_data.clear()
+        get_transactions.clear()
         df = get_transactions(force_reload=True)
         st.rerun()
 
@@ -247,8 +465,12 @@ def create_sidebar_filters(df: pl.DataFrame) -> Tuple[str, str, str, List[str],
         format_func=lambda x: MAP_PERIODE_NAMES[x]
     )
 
-    periodes = df.select(pl.col(periode)).unique().sort(periode, descending=True).to_series().to_list()
-    periode_specifique = st.sidebar.selectbox("Période", periodes)
+    periodes = get_periode_options(df)[periode]
+    periode_specifique = st.sidebar.selectbox(
+        "Période",
+        periodes,
+        format_func=lambda x: format_periode(periode, x)
+    )
 
     # Ajout du bouton de lissage
     lissage = st.sidebar.checkbox("Lissage Mensuel", value=False)
@@ -296,26 +518,35 @@ def create_sidebar_filters(df: pl.DataFrame) -> Tuple[str, str, str, List[str],
 
     return periode, periode_specifique, groupe, selected_categories, lissage, compte
     
-def display_transactions_table(df: pl.DataFrame, periode: str, periode_specifique: str) -> None:
+def display_transactions_table(df: pl.DataFrame, periode: str, periode_specifique: int) -> None:
     """Affiche le tableau des transactions.
     
     Args:
         df (pl.DataFrame): DataFrame des transactions
         periode (str): Période
-        periode_specifique (str): Période spécifique
+        periode_specifique (int): Période spécifique
     """
     st.subheader("Transactions")
-    transactions_display = df.filter(pl.col(periode) == periode_specifique).select([
-        "date", "nom", "categorie", "montant", "description", "compte"
+    transactions = df.filter(pl.col(periode) == periode_specifique).select([
+        "date", "nom", "categorie", "montant", "description", "compte", "categorie-parent"
+    ])
+
+    # Styles calculés par expressions Polars plutôt que par une fonction Python par cellule
+    styles = transactions.select([
+        pl.when(pl.col("montant") < 0)
+        .then(pl.lit(f'color: {CATEGORY_COLORS["Quotidien"]}'))
+        .otherwise(pl.lit(f'color: {CATEGORY_COLORS["Revenus"]}'))
+        .alias("montant"),
+        pl.col("categorie-parent")
+        .replace({categorie: f'color: {color}' for categorie, color in CATEGORY_COLORS.items()}, default='')
+        .alias("categorie")
     ]).to_pandas()
+    transactions_display = transactions.drop("categorie-parent").to_pandas()
 
     st.dataframe(
-        transactions_display.style.map(
-            lambda x: f'color: {CATEGORY_COLORS["Quotidien"]}' if x < 0 else f'color: {CATEGORY_COLORS["Revenus"]}',
-            subset=['montant']
-        ).map(
-            lambda x: f'color: {CATEGORY_COLORS[x.split(" > ")[0]]}' if x is not None and x.split(" > ")[0] in CATEGORY_COLORS else '',
-            subset=['categorie']
+        transactions_display.style.apply(
+            lambda column: styles[column.name],
+            subset=['montant', 'categorie']
         ).set_table_attributes('style="margin: auto;"'),
         column_config={
             "date": st.column_config.DateColumn(
@@ -352,20 +583,9 @@ def main() -> None:
     
     # Création des filtres
     periode, periode_specifique, groupe, selected_categories, lissage, compte = create_sidebar_filters(df)
+    enfant_to_parent = get_enfant_to_parent(df)
 
-    # Filtrage par compte
-    df = df.filter(pl.col("compte") == compte)
-
-    # Filtrage des données selon la sélection
-    df = df.filter(
-        pl.col("categorie-parent").is_in(selected_categories) & 
-        pl.col("categorie-enfant").is_in(selected_categories) | 
-        pl.col(f"categorie-{groupe}").is_null()
-    )
-
-    # Préparation des données pour les graphiques
-    df_camembert = df.filter(pl.col(f"categorie-{groupe}") != "Revenus")
-    df_camembert = df_camembert.filter(pl.col(periode) == periode_specifique)
+    selected_categories = tuple(selected_categories)
 
     # Calcul du facteur de lissage
     facteur_lissage = 1
@@ -377,37 +597,12 @@ def main() -> None:
         elif periode == "annee":
             facteur_lissage = 12  # Lissage pour l'année
 
-    df_categories = df_camembert.group_by(f"categorie-{groupe}").agg([
-        pl.when(pl.col("montant").sum() < 0).then(pl.col("montant").sum().abs() / facteur_lissage).alias("montant")
-    ])
-
-    if groupe == "parent":
-        df_enfants = (
-            df_camembert
-            .group_by(["categorie-parent", "categorie-enfant"])
-            .agg((pl.col("montant").sum() / facteur_lissage).alias("montant"))
-            .sort("montant")
-            .with_columns([pl.col("montant").map_elements(lambda x: f"{x:,.0f}").alias("montant")])
-        )
-
-        df_sous_categories = (
-            df_enfants
-            .group_by("categorie-parent")
-            .agg(pl.format("{}: {}€", "categorie-enfant", "montant").alias("details"))
-            .with_columns([pl.col("details").list.join("<br>").alias("hover_detail")])
-        ).select(["categorie-parent", "hover_detail"])
-
-        df_categories = df_categories.join(df_sous_categories, on="categorie-parent", how="left")
-    
-    df_totaux = df.group_by(periode).agg([
-        (pl.col("montant").filter(pl.col("categorie-parent") != "Revenus").sum() / facteur_lissage).alias("depenses"),
-        (pl.col("montant").filter(pl.col("categorie-parent") == "Revenus").sum() / facteur_lissage).alias("revenus"),
-        (pl.col("montant").sum() / facteur_lissage).alias("epargne")
-    ]).sort(periode)
+    # Préparation des données pour les graphiques
+    df_categories = compute_categories(df, compte, selected_categories, groupe, periode, periode_specifique, facteur_lissage)
+    df_totaux = compute_totaux(df, compte, selected_categories, groupe, periode, facteur_lissage)
 
     # Création des graphiques
-    map_categories = df.select(["categorie-parent", "categorie-enfant"]).unique()
-    fig_categories = create_pie_chart(df_categories, df_categories[f"categorie-{groupe}"].to_list(), map_categories, groupe, periode_specifique, lissage)
+    fig_categories = create_pie_chart(df_categories, df_categories[f"categorie-{groupe}"].to_list(), enfant_to_parent, groupe, format_periode(periode, periode_specifique), lissage)
     fig_totaux = create_bar_chart(df_totaux, periode, lissage)
 
     # Affichage des graphiques
@@ -418,7 +613,7 @@ def main() -> None:
         st.plotly_chart(fig_categories, use_container_width=True)
 
     # Affichage du tableau des transactions
-    display_transactions_table(df, periode, periode_specifique)
+    display_transactions_table(filter_transactions(df, compte, selected_categories, groupe).collect(), periode, periode_specifique)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
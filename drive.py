@@ -5,7 +5,7 @@ import os
 import io
 import polars as pl
 import streamlit as st
-from typing import Optional
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
@@ -15,18 +15,40 @@ DRIVE_FOLDER_ID = os.getenv("DRIVE_FOLDER_ID")
 if not DRIVE_FOLDER_ID:
     raise ValueError("❌ La variable d'environnement DRIVE_FOLDER_ID est requise")
 
+# Taille des blocs téléchargés : un fichier de transactions tient en une requête
+DRIVE_DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Correspondance nom -> ID des fichiers du dossier Drive, résolue à la demande
+DRIVE_FILE_IDS: Dict[str, str] = {}
+
+@st.cache_resource(show_spinner=False)
+def get_google_drive_credentials() -> service_account.Credentials:
+    """Lit les identifiants du compte de service, une seule fois pour toute l'application.
+    
+    Les erreurs sont propagées afin qu'un échec d'authentification ne soit pas
+    mis en cache.
+    
+    Returns:
+        service_account.Credentials: Les identifiants Google Drive
+    """
+    return service_account.Credentials.from_service_account_info(
+        st.secrets["gcp_service_account"],
+        scopes=SCOPES
+    )
+
 def get_google_drive_service():
     """Initialise et retourne le service Google Drive.
     
+    Le client HTTP (httplib2) n'étant pas thread-safe, le service est conservé
+    par session plutôt que partagé entre les sessions.
+    
     Returns:
         Optional[build]: Le service Google Drive ou None en cas d'erreur.
     """
     try:
-        credentials = service_account.Credentials.from_service_account_info(
-            st.secrets["gcp_service_account"],
-            scopes=SCOPES
-        )
-        return build('drive', 'v3', credentials=credentials)
+        if "drive_service" not in st.session_state:
+            st.session_state.drive_service = build('drive', 'v3', credentials=get_google_drive_credentials())
+        return st.session_state.drive_service
     except KeyError:
         st.error("❌ Les identifiants Google Drive ne sont pas configurés dans les secrets Streamlit")
         return None
@@ -34,6 +56,28 @@ def get_google_drive_service():
         st.error(f"❌ Erreur lors de l'authentification Google Drive: {str(e)}")
         return None
 
+def get_drive_file_id(service, file_name: str) -> Optional[str]:
+    """Retourne l'ID d'un fichier du dossier Drive, recherché une seule fois par nom.
+    
+    Args:
+        service (build): Le service Google Drive
+        file_name (str): Le nom du fichier
+        
+    Returns:
+        Optional[str]: L'ID du fichier ou None s'il n'existe pas
+    """
+    if file_name not in DRIVE_FILE_IDS:
+        results = service.files().list(
+            q=f"name='{file_name}' and '{DRIVE_FOLDER_ID}' in parents",
+            spaces='drive',
+            fields='files(id)'
+        ).execute()
+        items = results.get('files', [])
+        if not items:
+            return None
+        DRIVE_FILE_IDS[file_name] = items[0]['id']
+    return DRIVE_FILE_IDS[file_name]
+
 def save_to_drive(df: pl.DataFrame, file_name: str) -> Optional[str]:
     """Sauvegarde un DataFrame Polars sur Google Drive.
     
@@ -49,28 +93,22 @@ def save_to_drive(df: pl.DataFrame, file_name: str) -> Optional[str]:
         return None
     
     try:
-        # Convertit le DataFrame en CSV dans un buffer mémoire
+        # Convertit le DataFrame en Parquet dans un buffer mémoire
         buffer = io.BytesIO()
-        df.write_csv(buffer)
+        df.write_parquet(buffer, compression='zstd', compression_level=3)
         buffer.seek(0)
         
         # Vérifie si le fichier existe déjà
-        results = service.files().list(
-            q=f"name='{file_name}' and '{DRIVE_FOLDER_ID}' in parents",
-            spaces='drive',
-            fields='files(id)'
-        ).execute()
-        items = results.get('files', [])
+        file_id = get_drive_file_id(service, file_name)
         
         file_metadata = {
             'name': file_name,
             'parents': [DRIVE_FOLDER_ID]
         }
-        media = MediaIoBaseUpload(buffer, mimetype='text/csv', resumable=True)
+        media = MediaIoBaseUpload(buffer, mimetype='application/octet-stream', resumable=True)
         
-        if items:
+        if file_id:
             # Met à jour le fichier existant
-            file_id = items[0]['id']
             file = service.files().update(
                 fileId=file_id,
                 media_body=media
@@ -84,6 +122,7 @@ def save_to_drive(df: pl.DataFrame, file_name: str) -> Optional[str]:
             ).execute()
         
         file_id = file.get('id')
+        DRIVE_FILE_IDS[file_name] = file_id
         file_url = f"https://drive.google.com/file/d/{file_id}/view"
         
         # Stocke le message dans la session
@@ -95,6 +134,8 @@ def save_to_drive(df: pl.DataFrame, file_name: str) -> Optional[str]:
         
         return file_id
     except Exception as e:
+        # L'ID mémorisé peut désigner un fichier supprimé entre-temps
+        DRIVE_FILE_IDS.pop(file_name, None)
         st.session_state.drive_message = {
             'type': 'error',
             'message': f"Erreur lors de la sauvegarde sur Google Drive: {str(e)}",
@@ -102,11 +143,12 @@ def save_to_drive(df: pl.DataFrame, file_name: str) -> Optional[str]:
         }
         return None
 
-def load_from_drive(file_name: str) -> Optional[pl.DataFrame]:
-    """Charge un fichier depuis Google Drive.
+def load_from_drive(file_name: str, columns: Optional[List[str]] = None) -> Optional[pl.DataFrame]:
+    """Charge un fichier Parquet depuis Google Drive.
     
     Args:
         file_name (str): Le nom du fichier à charger
+        columns (Optional[List[str]]): Les colonnes à lire, toutes par défaut
         
     Returns:
         Optional[pl.DataFrame]: Le DataFrame chargé ou None en cas d'erreur
@@ -116,14 +158,9 @@ def load_from_drive(file_name: str) -> Optional[pl.DataFrame]:
         return None
     
     try:
-        results = service.files().list(
-            q=f"name='{file_name}' and '{DRIVE_FOLDER_ID}' in parents",
-            spaces='drive',
-            fields='files(id)'
-        ).execute()
-        items = results.get('files', [])
+        file_id = get_drive_file_id(service, file_name)
         
-        if not items:
+        if not file_id:
             st.session_state.drive_message = {
                 'type': 'warning',
                 'message': f"Aucun fichier '{file_name}' trouvé dans le dossier Drive",
@@ -131,17 +168,17 @@ def load_from_drive(file_name: str) -> Optional[pl.DataFrame]:
             }
             return None
         
-        file_id = items[0]['id']
         request = service.files().get_media(fileId=file_id)
         fh = io.BytesIO()
-        downloader = MediaIoBaseDownload(fh, request)
+        downloader = MediaIoBaseDownload(fh, request, chunksize=DRIVE_DOWNLOAD_CHUNK_SIZE)
         done = False
         while done is False:
             status, done = downloader.next_chunk()
         
         fh.seek(0)
-        return pl.read_csv(fh)
+        return pl.read_parquet(fh, columns=columns)
     except Exception as e:
+        DRIVE_FILE_IDS.pop(file_name, None)
         st.session_state.drive_message = {
             'type': 'error',
             'message': f"Erreur lors du chargement depuis Google Drive: {str(e)}",
@@ -1,13 +1,19 @@
 import os
+import asyncio
 from dotenv import load_dotenv
 import polars as pl
 from datetime import datetime
 import subprocess
 import json
-from notion_client import Client
+from concurrent.futures import ThreadPoolExecutor
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 from drive import load_from_drive, save_to_drive
 import streamlit as st
-from typing import List, Dict, Optional, Any
+from typing import TYPE_CHECKING, Callable, List, Dict, Optional, Any
+
+if TYPE_CHECKING:
+    import httpx
+    from notion_client import Client, AsyncClient
 
 load_dotenv(override=True)
 NOTION_TOKEN = os.getenv("NOTION_TOKEN")
@@ -17,7 +23,79 @@ BANK_ID = {"PERSO": os.getenv("BANK_PERSO_ID"), "JOINT": os.getenv("BANK_JOINT_I
 if not NOTION_TOKEN or not NOTION_DATABASE_ID:
     raise ValueError("❌ Les variables d'environnement NOTION_TOKEN et NOTION_DATABASE_ID sont requises")
 
-notion = Client(auth=NOTION_TOKEN)
+# Cache global des catégories, pour combiner des DataFrames chargés séparément
+pl.enable_string_cache()
+
+# Connexions HTTP conservées ouvertes entre les requêtes Notion
+NOTION_MAX_CONNECTIONS = 16
+NOTION_MAX_KEEPALIVE_CONNECTIONS = 8
+NOTION_HTTP_RETRIES = 3
+# Envoi concurrent des nouvelles pages, avec reprise sur limitation de débit (429)
+NOTION_SEND_WORKERS = 8
+NOTION_RATE_LIMIT_ATTEMPTS = 5
+
+# Propriétés Notion lues par l'application
+NOTION_PROPERTIES = ["Date", "Nom", "Catégorie", "Montant", "Description", "Compte"]
+NOTION_PAGE_SIZE = 100
+PROPERTY_IDS: Dict[str, str] = {}
+
+# Schéma des transactions récupérées depuis Notion
+NOTION_SCHEMA = {
+    "date": pl.Date,
+    "nom": pl.Utf8,
+    "categorie": pl.Utf8,
+    "montant": pl.Float64,
+    "description": pl.Utf8,
+    "compte": pl.Utf8,
+    "id": pl.Utf8,
+    "last_edited_time": pl.Utf8
+}
+
+# Fichier de cache des transactions sur Google Drive
+TRANSACTIONS_FILE = "transactions.parquet"
+TRANSACTIONS_COLUMNS = [
+    "date", "nom", "categorie", "montant", "description", "compte", "id", "last_edited_time",
+    "mois", "trimestre", "annee", "categorie-parent", "categorie-enfant"
+]
+# Fichier de cache des IDs de transactions déjà présentes dans Notion
+TRANSACTION_IDS_FILE = "transaction_ids.parquet"
+TRANSACTION_IDS_SCHEMA = {"id": pl.Utf8, "created_time": pl.Utf8}
+
+# Colonnes de faible cardinalité encodées en dictionnaire
+CATEGORICAL_COLUMNS = ["categorie-parent", "categorie-enfant"]
+# Les périodes sont des clés entières (202403, 20241, 2024), formatées à l'affichage
+PERIODE_DTYPE = pl.UInt32
+# Colonnes triées par ordre décroissant, comme la date des transactions
+SORTED_COLUMNS = ["date", "mois", "trimestre", "annee"]
+
+def get_notion_http_limits() -> "httpx.Limits":
+    """Retourne les limites du pool de connexions HTTP vers Notion.
+    
+    Returns:
+        httpx.Limits: Les limites du pool de connexions
+    """
+    import httpx
+
+    return httpx.Limits(
+        max_connections=NOTION_MAX_CONNECTIONS,
+        max_keepalive_connections=NOTION_MAX_KEEPALIVE_CONNECTIONS
+    )
+
+@st.cache_resource
+def get_notion_client() -> "Client":
+    """Initialise et retourne le client Notion, partagé entre les sessions.
+    
+    notion_client n'est importé qu'ici : l'application n'en a pas besoin
+    lorsque les transactions sont chargées depuis Google Drive.
+    
+    Returns:
+        Client: Le client Notion
+    """
+    import httpx
+    from notion_client import Client
+
+    transport = httpx.HTTPTransport(retries=NOTION_HTTP_RETRIES, limits=get_notion_http_limits())
+    return Client(auth=NOTION_TOKEN, client=httpx.Client(transport=transport))
 
 def get_transactions_from_woob() -> List[Dict[str, Any]]:
     """Récupère les transactions depuis Woob.
@@ -30,17 +108,22 @@ def get_transactions_from_woob() -> List[Dict[str, Any]]:
     """
     try:
         transactions = []
-        for compte in ['PERSO', 'JOINT']:
-            woob_path = os.path.join(os.path.dirname(__file__), ".venv/bin/woob")
-            result = subprocess.run([
+        woob_path = os.path.join(os.path.dirname(__file__), ".venv/bin/woob")
+        # Les comptes sont interrogés en parallèle, un processus Woob chacun
+        processes = {
+            compte: subprocess.Popen([
                 woob_path, "bank", "history", BANK_ID[compte], "-n", "15", "-f", "json"
             ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            
-            if result.returncode != 0:
-                print(f"❌ Erreur Woob: {result.stderr}")
+            for compte in ['PERSO', 'JOINT']
+        }
+        outputs = {compte: process.communicate() for compte, process in processes.items()}
+
+        for compte, (stdout, stderr) in outputs.items():
+            if processes[compte].returncode != 0:
+                print(f"❌ Erreur Woob: {stderr}")
                 return []
 
-            raw_transactions = json.loads(result.stdout)
+            raw_transactions = json.loads(stdout)
             transactions.extend(
                 [
                     {
@@ -64,29 +147,62 @@ def get_transactions_from_woob() -> List[Dict[str, Any]]:
 def get_existing_transaction_ids() -> set:
     """Récupère les IDs des transactions existantes dans Notion.
     
+    Les IDs sont conservés sur Google Drive : seules les pages créées depuis
+    la dernière synchronisation sont demandées à Notion.
+    
     Returns:
         set: Ensemble des IDs de transactions
     """
-    existing_ids = set()
-    has_more = True
-    start_cursor = None
+    cached = load_from_drive(TRANSACTION_IDS_FILE)
+    # Un cache vide n'a pas de date de création maximale : récupération complète
+    if cached is not None and cached.is_empty():
+        cached = None
 
-    while has_more:
-        response = notion.databases.query(
-            database_id=NOTION_DATABASE_ID,
-            start_cursor=start_cursor if start_cursor else None
-        )
+    timestamp_filter = None
+    if cached is not None:
+        timestamp_filter = build_timestamp_filter("created_time", cached["created_time"].max())
 
-        for page in response["results"]:
-            prop = page["properties"].get("ID Transaction", {})
-            rich_text = prop.get("rich_text", [])
-            if rich_text:
-                existing_ids.add(rich_text[0]["text"]["content"])
+    chunks = asyncio.run(fetch_all_pages(parse_transaction_ids, ["ID Transaction"], timestamp_filter))
+    df_ids = pl.concat(chunks)
+    if cached is not None:
+        df_ids = pl.concat([cached, df_ids]).unique(subset="id")
 
-        has_more = response.get("has_more", False)
-        start_cursor = response.get("next_cursor")
+    if not df_ids.is_empty() and (cached is None or df_ids.height > cached.height):
+        save_to_drive(df_ids, TRANSACTION_IDS_FILE)
+
+    return set(df_ids["id"].to_list())
+
+def is_rate_limited(exception: BaseException) -> bool:
+    """Indique si une erreur Notion correspond à une limitation de débit (HTTP 429).
+    
+    Args:
+        exception (BaseException): L'erreur levée par le client Notion
+        
+    Returns:
+        bool: True si la requête peut être relancée
+    """
+    from notion_client import APIResponseError
+    return isinstance(exception, APIResponseError) and exception.code == "rate_limited"
 
-    return existing_ids
+@retry(
+    retry=retry_if_exception(is_rate_limited),
+    wait=wait_exponential(multiplier=1, max=30),
+    stop=stop_after_attempt(NOTION_RATE_LIMIT_ATTEMPTS),
+    reraise=True,
+)
+def create_notion_page(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Crée une page dans la base Notion, avec reprise exponentielle sur 429.
+    
+    Args:
+        properties (Dict[str, Any]): Les propriétés de la page
+        
+    Returns:
+        Dict[str, Any]: La réponse de l'API Notion
+    """
+    return get_notion_client().pages.create(
+        parent={"database_id": NOTION_DATABASE_ID},
+        properties=properties
+    )
 
 def send_transaction_to_notion(tx: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """Ajoute une transaction à la base Notion.
@@ -98,17 +214,14 @@ def send_transaction_to_notion(tx: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         Optional[Dict[str, Any]]: La réponse de l'API Notion ou None en cas d'erreur
     """
     try:
-        response = notion.pages.create(
-            parent={"database_id": NOTION_DATABASE_ID},
-            properties={
-                "Date": {"date": {"start": tx["date"]}},
-                "Nom": {"title": [{"text": {"content": tx["nom"]}}]},
-                "Montant": {"number": tx["montant"]},
-                "Description": {"rich_text": [{"text": {"content": tx["description"] if tx["description"] else ''}}]},
-                "ID Transaction": {"rich_text": [{"text": {"content": tx["id"]}}]},
-                "Compte": {"select": {"name": tx["compte"]}},
-            }
-        )
+        response = create_notion_page({
+            "Date": {"date": {"start": tx["date"]}},
+            "Nom": {"title": [{"text": {"content": tx["nom"]}}]},
+            "Montant": {"number": tx["montant"]},
+            "Description": {"rich_text": [{"text": {"content": tx["description"] if tx["description"] else ''}}]},
+            "ID Transaction": {"rich_text": [{"text": {"content": tx["id"]}}]},
+            "Compte": {"select": {"name": tx["compte"]}},
+        })
         return response
     except Exception as e:
         print(f"❌ Erreur lors de l'ajout de la transaction {tx.get('id')}: {str(e)}")
@@ -129,99 +242,303 @@ def send_transactions_to_notion(transactions: List[Dict[str, Any]]) -> Dict[str,
     new_transactions = [txn for txn in transactions if txn["id"] not in existing_ids]
     print(f"🆕 {len(new_transactions)} nouvelles transactions à ajouter.")
 
-    success = 0
-    for tx in new_transactions:
-        if send_transaction_to_notion(tx):
-            success += 1
+    with ThreadPoolExecutor(max_workers=NOTION_SEND_WORKERS) as executor:
+        results = list(executor.map(send_transaction_to_notion, new_transactions))
+    success = sum(1 for response in results if response)
     print(f"[Notion] {success}/{len(new_transactions)} transactions ajoutées")
     return {"success": success}
 
-def load_transactions_from_csv() -> Optional[pl.DataFrame]:
-    """Charge les transactions depuis le fichier CSV sur Google Drive.
+def load_transactions_from_parquet() -> Optional[pl.DataFrame]:
+    """Charge les transactions depuis le fichier Parquet sur Google Drive.
     
     Returns:
-        Optional[pl.DataFrame]: Le DataFrame des transactions ou None en cas d'erreur
+        Optional[pl.DataFrame]: Le DataFrame des transactions ou None s'il est absent ou illisible
     """
     try:
-        df = load_from_drive("transactions.csv")
+        df = load_from_drive(TRANSACTIONS_FILE, columns=TRANSACTIONS_COLUMNS)
         if df is None:
-            st.warning("⚠️ Aucun fichier CSV trouvé sur Google Drive")
             return None
-        return df
+        return set_sorted_columns(cast_categoricals(df))
     except Exception as e:
-        st.error(f"❌ Erreur lors du chargement du CSV: {str(e)}")
+        st.error(f"❌ Erreur lors du chargement du Parquet: {str(e)}")
         return None
 
-def preprocess_transactions(transactions: List[Dict[str, Any]]) -> pl.DataFrame:
-    """Prétraite les transactions pour l'affichage.
+def cast_categoricals(df: pl.DataFrame) -> pl.DataFrame:
+    """Encode les colonnes de faible cardinalité en catégories triées lexicalement.
+    
+    Parquet ne conserve pas l'ordre lexical des catégories : il est réappliqué
+    au chargement pour que les tris restent alphabétiques.
     
     Args:
-        transactions (List[Dict[str, Any]]): Liste des transactions à prétraiter
+        df (pl.DataFrame): DataFrame des transactions
         
     Returns:
-        pl.DataFrame: DataFrame prétraité
+        pl.DataFrame: DataFrame avec les colonnes catégorielles
     """
-    df = pl.DataFrame(transactions)
+    return df.with_columns([
+        pl.col(CATEGORICAL_COLUMNS).cast(pl.Categorical("lexical"))
+    ])
+
+def set_sorted_columns(df: pl.DataFrame) -> pl.DataFrame:
+    """Marque les colonnes temporelles comme triées par ordre décroissant.
     
-    # Conversion de la date et création des colonnes temporelles
-    df = df.with_columns([
-        pl.col("date").str.strptime(pl.Date, "%Y-%m-%d").alias("date")
+    Le DataFrame étant trié par date décroissante, les mois, trimestres et
+    années le sont aussi. Ce tri, perdu par Parquet, permet à Polars d'utiliser
+    ses algorithmes dédiés aux données triées.
+    
+    Args:
+        df (pl.DataFrame): DataFrame des transactions trié par date décroissante
+        
+    Returns:
+        pl.DataFrame: DataFrame avec les colonnes marquées comme triées
+    """
+    return df.with_columns([
+        pl.col(column).set_sorted(descending=True) for column in SORTED_COLUMNS
     ])
 
+def add_periodes(df: pl.DataFrame) -> pl.DataFrame:
+    """Calcule les clés entières de mois, trimestre et année à partir de la date.
+    
+    Args:
+        df (pl.DataFrame): DataFrame des transactions
+        
+    Returns:
+        pl.DataFrame: DataFrame avec les colonnes mois, trimestre et annee
+    """
+    annee = pl.col("date").dt.year()
+    return df.with_columns([
+        (annee * 100 + pl.col("date").dt.month()).cast(PERIODE_DTYPE).alias("mois"),
+        (annee * 10 + pl.col("date").dt.quarter()).cast(PERIODE_DTYPE).alias("trimestre"),
+        annee.cast(PERIODE_DTYPE).alias("annee")
+    ])
+
+def preprocess_transactions(df: pl.DataFrame) -> pl.DataFrame:
+    """Prétraite les transactions pour l'affichage.
+    
+    Args:
+        df (pl.DataFrame): DataFrame des transactions à prétraiter
+        
+    Returns:
+        pl.DataFrame: DataFrame prétraité
+    """
+    # Création des colonnes temporelles
+    df = add_periodes(df).with_columns([
+        pl.col("categorie").str.split_exact(" > ", 1).struct.rename_fields(
+            ["categorie-parent", "categorie-enfant"]
+        ).alias("categorie-split")
+    ]).unnest("categorie-split")
+
+    # Une catégorie sans sous-catégorie est sa propre catégorie enfant
     df = df.with_columns([
-        pl.col("date").dt.strftime("%Y-%m").alias("mois"),
-        pl.concat_str([
-            pl.col("date").dt.year().cast(pl.Utf8),
-            pl.lit("-T"),
-            pl.col("date").dt.quarter().cast(pl.Utf8)
-        ]).alias("trimestre"),
-        pl.col("date").dt.year().cast(pl.Utf8).alias("annee"),
-        pl.col("categorie").str.split(" > ").list.first().alias("categorie-parent"),
-        pl.col("categorie").str.split(" > ").list.last().alias("categorie-enfant")
+        pl.col("categorie-enfant").fill_null(pl.col("categorie-parent"))
     ])
     
-    return df.sort("date", descending=True)
+    return set_sorted_columns(cast_categoricals(df).sort("date", descending=True))
 
-def get_transactions_from_notion(force_reload: bool = False) -> Optional[pl.DataFrame]:
-    """Récupère les transactions depuis Notion ou le CSV sur Google Drive.
+def get_property_ids(names: List[str]) -> List[str]:
+    """Récupère les IDs de propriétés Notion à partir de leurs noms.
+    
+    Le schéma de la base n'est récupéré qu'une fois puis conservé en mémoire.
     
     Args:
-        force_reload (bool): Force le rechargement depuis Notion
+        names (List[str]): Noms des propriétés
         
     Returns:
-        Optional[pl.DataFrame]: Le DataFrame des transactions ou None en cas d'erreur
+        List[str]: Liste des IDs de propriétés
     """
-    # Vérification du CSV si pas de rechargement forcé
-    if not force_reload:
-        return load_transactions_from_csv()
+    if not PROPERTY_IDS:
+        database = get_notion_client().databases.retrieve(NOTION_DATABASE_ID)
+        PROPERTY_IDS.update({name: prop["id"] for name, prop in database["properties"].items()})
+    return [PROPERTY_IDS[name] for name in names]
 
-    # Récupération depuis Notion
-    transactions = []
+def parse_pages(pages: List[Dict[str, Any]]) -> pl.DataFrame:
+    """Convertit une page de résultats Notion en DataFrame.
+    
+    Args:
+        pages (List[Dict[str, Any]]): Les pages Notion d'une réponse
+        
+    Returns:
+        pl.DataFrame: DataFrame des transactions
+    """
+    # Une liste par colonne pour construire le DataFrame en une fois, avec
+    # les méthodes append liées une seule fois plutôt qu'à chaque ligne
+    columns = {name: [] for name in NOTION_SCHEMA}
+    append_date = columns["date"].append
+    append_nom = columns["nom"].append
+    append_categorie = columns["categorie"].append
+    append_montant = columns["montant"].append
+    append_description = columns["description"].append
+    append_compte = columns["compte"].append
+    append_id = columns["id"].append
+    append_last_edited_time = columns["last_edited_time"].append
+
+    for page in pages:
+        props = page["properties"]
+        append_date(props["Date"]["date"]["start"])
+        append_nom(props["Nom"]["title"][0]["text"]["content"])
+        append_categorie((props["Catégorie"]["select"] or {}).get("name"))
+        append_montant(props["Montant"]["number"])
+        append_description(props["Description"]["rich_text"][0]["text"]["content"])
+        append_compte(props["Compte"]["select"]["name"])
+        append_id(page["id"])
+        append_last_edited_time(page["last_edited_time"])
+
+    # Dates ISO analysées en une passe par Polars plutôt que ligne par ligne
+    columns["date"] = pl.Series("date", columns["date"], dtype=pl.Utf8).str.to_date("%Y-%m-%d")
+    return pl.DataFrame(columns, schema=NOTION_SCHEMA)
+
+def parse_transaction_ids(pages: List[Dict[str, Any]]) -> pl.DataFrame:
+    """Extrait les IDs de transactions d'une page de résultats Notion.
+    
+    Args:
+        pages (List[Dict[str, Any]]): Les pages Notion d'une réponse
+        
+    Returns:
+        pl.DataFrame: DataFrame des IDs de transactions et de leur date de création
+    """
+    columns = {name: [] for name in TRANSACTION_IDS_SCHEMA}
+    for page in pages:
+        prop = page["properties"].get("ID Transaction", {})
+        rich_text = prop.get("rich_text", [])
+        if rich_text:
+            columns["id"].append(rich_text[0]["text"]["content"])
+            columns["created_time"].append(page["created_time"])
+    return pl.DataFrame(columns, schema=TRANSACTION_IDS_SCHEMA)
+
+async def fetch_pages(async_notion: "AsyncClient", query_filter: Dict[str, Any], property_ids: List[str], parse: Callable[[List[Dict[str, Any]]], Any]) -> List[Any]:
+    """Récupère les pages Notion correspondant à un filtre.
+    
+    Chaque réponse est convertie par `parse` dès sa réception, ce qui libère
+    le JSON brut sans attendre la fin de la pagination.
+    
+    Args:
+        async_notion (AsyncClient): Le client Notion asynchrone
+        query_filter (Dict[str, Any]): Le filtre de la requête Notion
+        property_ids (List[str]): IDs des propriétés à renvoyer
+        parse (Callable[[List[Dict[str, Any]]], Any]): Conversion des pages d'une réponse
+        
+    Returns:
+        List[Any]: Résultats de la conversion de chaque réponse
+    """
+    chunks = []
     has_more = True
     start_cursor = None
 
     while has_more:
-        response = notion.databases.query(
+        response = await async_notion.databases.query(
             database_id=NOTION_DATABASE_ID,
-            start_cursor=start_cursor
+            start_cursor=start_cursor,
+            page_size=NOTION_PAGE_SIZE,
+            filter=query_filter,
+            filter_properties=property_ids
         )
-
-        for page in response["results"]:
-            props = page["properties"]
-            transactions.append({
-                "date": props["Date"]["date"]["start"],
-                "nom": props["Nom"]["title"][0]["text"]["content"],
-                "categorie": props["Catégorie"]["select"]["name"] if props["Catégorie"]["select"] else None,
-                "montant": props["Montant"]["number"],
-                "description": props["Description"]["rich_text"][0]["text"]["content"],
-                "compte": props["Compte"]["select"]["name"]
-            })
+        chunks.append(parse(response["results"]))
 
         has_more = response.get("has_more", False)
         start_cursor = response.get("next_cursor")
 
-    df = preprocess_transactions(transactions)
-    save_to_drive(df, "transactions.csv")
+    return chunks
+
+def build_timestamp_filter(timestamp: str, after: str) -> Dict[str, Any]:
+    """Construit un filtre Notion sur l'horodatage des pages.
+    
+    Notion arrondit les horodatages à la minute : on_or_after évite de manquer
+    une page, les doublons sont écartés à la fusion avec le cache.
+    
+    Args:
+        timestamp (str): Horodatage filtré, created_time ou last_edited_time
+        after (str): Date ISO à partir de laquelle récupérer les pages
+        
+    Returns:
+        Dict[str, Any]: Le filtre Notion
+    """
+    return {"timestamp": timestamp, timestamp: {"on_or_after": after}}
+
+async def fetch_all_pages(parse: Callable[[List[Dict[str, Any]]], Any], property_names: List[str], timestamp_filter: Optional[Dict[str, Any]] = None) -> List[Any]:
+    """Récupère les pages Notion de tous les comptes en parallèle.
+    
+    La pagination Notion est séquentielle (chaque curseur dépend de la réponse
+    précédente), la base est donc découpée par compte pour paginer chaque
+    partition de façon concurrente.
+    
+    Args:
+        parse (Callable[[List[Dict[str, Any]]], Any]): Conversion des pages d'une réponse
+        property_names (List[str]): Noms des propriétés à renvoyer
+        timestamp_filter (Optional[Dict[str, Any]]): Filtre sur l'horodatage des pages
+        
+    Returns:
+        List[Any]: Résultats de la conversion de chaque réponse
+    """
+    import httpx
+    from notion_client import AsyncClient
+
+    query_filters = []
+    for compte in BANK_ID:
+        query_filter = {"property": "Compte", "select": {"equals": compte}}
+        if timestamp_filter:
+            query_filter = {"and": [query_filter, timestamp_filter]}
+        query_filters.append(query_filter)
+
+    property_ids = get_property_ids(property_names)
+
+    # Le client asynchrone est lié à la boucle d'évènements : il ne peut pas
+    # être partagé comme le client synchrone et est recréé à chaque appel
+    transport = httpx.AsyncHTTPTransport(retries=NOTION_HTTP_RETRIES, limits=get_notion_http_limits())
+    async_notion = AsyncClient(auth=NOTION_TOKEN, client=httpx.AsyncClient(transport=transport))
+    try:
+        results = await asyncio.gather(*[
+            fetch_pages(async_notion, query_filter, property_ids, parse) for query_filter in query_filters
+        ])
+    finally:
+        await async_notion.aclose()
+    return [chunk for chunks in results for chunk in chunks]
+
+def get_transactions_from_notion(force_reload: bool = False) -> Optional[pl.DataFrame]:
+    """Récupère les transactions depuis le Parquet sur Google Drive, mis à jour depuis Notion.
+    
+    Par défaut, seules les pages modifiées depuis la dernière synchronisation
+    sont récupérées et fusionnées avec le cache. Les pages supprimées ou
+    archivées dans Notion n'étant pas détectées ainsi, le rechargement forcé
+    récupère toute la base et remplace le cache.
+    
+    Args:
+        force_reload (bool): Force la récupération complète depuis Notion
+        
+    Returns:
+        Optional[pl.DataFrame]: Le DataFrame des transactions ou None en cas d'erreur
+    """
+    cached = None if force_reload else load_transactions_from_parquet()
+    # Un cache vide n'a pas de date de modification maximale : récupération complète
+    if cached is not None and cached.is_empty():
+        cached = None
+
+    # Récupération depuis Notion
+    timestamp_filter = None
+    if cached is not None:
+        timestamp_filter = build_timestamp_filter("last_edited_time", cached["last_edited_time"].max())
+    try:
+        chunks = asyncio.run(fetch_all_pages(parse_pages, NOTION_PROPERTIES, timestamp_filter))
+    except Exception as e:
+        if cached is None:
+            raise
+        st.warning(f"⚠️ Mise à jour depuis Notion impossible, données du cache affichées : {str(e)}")
+        return cached
+    transactions = pl.concat(chunks, rechunk=True)
+
+    if cached is None:
+        df = preprocess_transactions(transactions)
+    elif not transactions.is_empty():
+        # Les pages modifiées remplacent leur version en cache
+        df_new = preprocess_transactions(transactions).select(cached.columns)
+        df = pl.concat(
+            [cached.filter(~pl.col("id").is_in(df_new["id"])), df_new],
+            how="vertical_relaxed"
+        ).sort("date", descending=True)
+        df = set_sorted_columns(df)
+    else:
+        return cached
+
+    save_to_drive(df, TRANSACTIONS_FILE)
     
     return df
 